@@ -8,24 +8,91 @@ This module provides a utility class for sending emails using SMTP.
 
 Classes:
     SmtpSender - Represents an SMTP email message with methods to add content and send.\n
+    SmtpConnection - Represents a reusable SMTP connection for sending many messages in one session.\n
+    SmtpConnectionPool - Represents a fixed size pool of reusable SMTP connections.\n
 
 Top-Level Functions:
     send_email_message - Creates and sends an SMTP email message in one function call.\n
+    send_batch - Asynchronously sends many SMTP email messages over a few reused connections.\n
 """
 
 
-from typing import List, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+import re
 import time
+import asyncio
+import queue
+import base64
+import io
+import mimetypes
 
 import os.path as pth
 
 import smtplib
-from email import encoders
+from email.charset import Charset, QP
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from email.message import Message
 from email.mime.base import MIMEBase
 
+# Optional SIMD accelerated base64 codec, falls back to the standard library if not installed
+try:
+    import pybase64
+except ImportError:
+    pybase64 = None
+
+
+# Attachments are read and encoded in blocks of this many bytes. A multiple of 57 bytes encodes
+# to whole 76 character base64 lines, so blocks can be encoded independently and concatenated.
+_ATTACHMENT_CHUNK_SIZE: int = 57 * 1024
+
+# Attachment files are read through a 1 MiB buffer, so large files take far fewer read system calls
+_ATTACHMENT_BUFFER_SIZE: int = 1 << 20
+
+# Length of an encoded base64 body line, per RFC 2045
+_BASE64_LINE_LENGTH: int = 76
+
+# Text attachments are sent as quoted-printable UTF-8, which stays close to the original size
+_TEXT_ATTACHMENT_CHARSET: Charset = Charset('utf-8')
+_TEXT_ATTACHMENT_CHARSET.body_encoding = QP
+
+# The last subject line timestamp, keyed by the epoch minute it was formatted in
+_timestamp_cache: Tuple[int, str] = (-1, '')
+
+
+def _encode_base64_lines(data: bytes) -> bytes:
+    """Encodes bytes as base64 folded into newline terminated lines, the same as base64.encodebytes."""
+    if pybase64 is None:
+        return base64.encodebytes(data)
+    encoded = pybase64.b64encode(data)
+    lines = [encoded[i:i + _BASE64_LINE_LENGTH] for i in range(0, len(encoded), _BASE64_LINE_LENGTH)]
+    lines.append(b'')
+    return b'\n'.join(lines)
+
+
+def _minute_timestamp() -> str:
+    """Returns the current local time formatted to the minute, reformatting only when the minute changes."""
+    global _timestamp_cache
+    minute = int(time.time() // 60)
+    if _timestamp_cache[0] != minute:
+        _timestamp_cache = (minute, time.strftime('%Y-%m-%d %H:%M'))
+    return _timestamp_cache[1]
+
+
+def _minify_css(style_text: str) -> str:
+    """Strips comments and collapses whitespace in stylesheet text, keeping spaces that separate tokens."""
+    style_text = re.sub(r'/\*.*?\*/', '', style_text, flags=re.S)
+    style_text = re.sub(r'\s+', ' ', style_text)
+    style_text = re.sub(r'\s*([{};:,])\s*', r'\1', style_text)
+    # One rule per line keeps 7bit message bodies under the SMTP line length limit
+    return style_text.replace('}', '}\n').strip()
+
+
+def _split_addresses(address: str) -> List[str]:
+    """Splits a comma delimited list of email addresses, stripping whitespace and dropping empty entries."""
+    return [a.strip() for a in address.split(',') if a.strip()]
+
 
 class SmtpSender:
     """
@@ -46,10 +113,11 @@ class SmtpSender:
         to_addresses - A list of email addresses for the To line.\n
         cc_addresses - A list of email addresses for the CC line.\n
         bcc_addresses - A list of email addresses to receive the message without being listed in the header.\n
+        recipients - A list of every unique To, Cc, and BCC address the message is sent to.\n
     """
 
-    # Static template stylesheet for html email content
-    _template_html_header: str = (
+    # Static template stylesheet for html email content, minified once at import
+    _template_html_header: str = _minify_css(
         """ 
         <style type="text/css">
 
@@ -223,58 +291,55 @@ class SmtpSender:
         self._to_addresses: List[str] = []
         self._cc_addresses: List[str] = []
         self._bcc_addresses: List[str] = []
-        self._recipients: List[str] = []
-        self._smtp_message: MIMEMultipart = MIMEMultipart("alternative")
-        self._html_header: str = ''
+        self._recipients_set: Dict[str, None] = {}
+        self._smtp_message: Optional[MIMEBase] = None
+        self._pending_attachments: List[MIMEBase] = []
         self._text_parts: List[str] = []
         self._html_parts: List[str] = []
 
         # Process the optional parameters, if given
-        to_list = None
-        bcc_list = None
-
-        for i in range(0, len(args)):
-            if i == 0:
-                self.add_plain_text(args[0])
-            elif i == 1:
-                self.add_html_text(args[1])
-            elif i == 2:
-                self.subject = args[2]
-            elif i == 3:
-                to_list = [a for a in args[3].split(",")]
-            elif i == 4:
-                bcc_list = [a for a in args[4].split(",")]
-            elif i == 5:
-                self.sendFrom = args[5]
-            elif i == 6:
-                self.smtp_server = args[6]
+        txt, html, subj, send_to, bcc, send_from, smtp_server = (list(args) + [None] * 7)[:7]
+
+        if txt is not None:
+            self.add_plain_text(txt)
+        if html is not None:
+            self.add_html_text(html)
+        if subj is not None:
+            self.subject = subj
+        if send_from is not None:
+            self.sendFrom = send_from
+        if smtp_server is not None:
+            self.smtp_server = smtp_server
+
+        to_list = None if send_to is None else _split_addresses(send_to)
+        bcc_list = None if bcc is None else _split_addresses(bcc)
 
         if not ((to_list is None) or (len(to_list) == 0)):
-            self._recipients = to_list.copy()
-            self._to_addresses = to_list.copy()
+            self._recipients_set.update(dict.fromkeys(to_list))
+            self._to_addresses = to_list
 
         if not ((bcc_list is None) or (len(bcc_list) == 0)):
-            if self._recipients is None:
-                self._recipients = bcc_list.copy()
-            else:
-                self._recipients.extend(bcc_list)
-            self._bcc_addresses = bcc_list.copy()
+            self._recipients_set.update(dict.fromkeys(bcc_list))
+            self._bcc_addresses = bcc_list
         # END __init__
 
     def add_to_line_address(self, address: str) -> None:
         """Adds To line recipient(s) to the message. Use a comma delimited list."""
-        self._to_addresses.extend(address.split(','))
-        self._recipients.extend(address.split(','))
+        parts = _split_addresses(address)
+        self._to_addresses.extend(parts)
+        self._recipients_set.update(dict.fromkeys(parts))
 
     def add_cc_line_address(self, address: str) -> None:
         """Adds Cc line recipient(s) to the message. Use a comma delimited list."""
-        self._cc_addresses.extend(address.split(','))
-        self._recipients.extend(address.split(','))
+        parts = _split_addresses(address)
+        self._cc_addresses.extend(parts)
+        self._recipients_set.update(dict.fromkeys(parts))
 
     def add_bcc_line_address(self, address: str) -> None:
         """Adds BCC recipient(s) to the message. Use a comma delimited list."""
-        self._bcc_addresses.extend(address.split(','))
-        self._recipients.extend(address.split(','))
+        parts = _split_addresses(address)
+        self._bcc_addresses.extend(parts)
+        self._recipients_set.update(dict.fromkeys(parts))
 
     def add_plain_text(self, plain_text: str) -> None:
         """Adds plain text content to the message body."""
@@ -282,22 +347,45 @@ class SmtpSender:
 
     def add_html_text(self, html_text: str, style_text: str = None) -> None:
         """Adds HTML content to the message body using the optional stylesheet text."""
-        if len(self._html_header) == 0:
+        # The first HTML part is preceded by the stylesheet so the body is joined only once when sent
+        if len(self._html_parts) == 0:
             if style_text is None:
-                self._html_header = self._template_html_header
+                self._html_parts.extend((self._template_html_header, '<BR>'))
             else:
-                self._html_header = style_text
+                self._html_parts.extend((style_text, '<BR>'))
         self._html_parts.append(html_text)
 
     def attach_file(self, file_path: str) -> None:
-        """Attaches a file to the message."""
+        """Attaches a file to the message, using a MIME type guessed from the file name."""
         file_name = pth.basename(file_path)
-        with open(file_path, "rb") as attachment:
-            file_part = MIMEBase("application", "octet-stream")
-            file_part.set_payload(attachment.read())
-        encoders.encode_base64(file_part)
+
+        # Compressed files are sent as opaque binary, otherwise the content type follows the extension
+        content_type, content_encoding = mimetypes.guess_type(file_path)
+        if (content_type is None) or (content_encoding is not None):
+            content_type = 'application/octet-stream'
+        main_type, sub_type = content_type.split('/', 1)
+
+        file_part = None
+        if main_type == 'text':
+            # UTF-8 text is sent quoted-printable, other encodings fall through to base64
+            try:
+                with open(file_path, "r", buffering=_ATTACHMENT_BUFFER_SIZE, encoding='utf-8') as attachment:
+                    file_part = MIMEText(attachment.read(), sub_type, _TEXT_ATTACHMENT_CHARSET)
+            except UnicodeDecodeError:
+                file_part = None
+
+        if file_part is None:
+            # Encode the file block by block so the raw file content is never held in memory whole
+            encoded = io.BytesIO()
+            with open(file_path, "rb", buffering=_ATTACHMENT_BUFFER_SIZE) as attachment:
+                while chunk := attachment.read(_ATTACHMENT_CHUNK_SIZE):
+                    encoded.write(_encode_base64_lines(chunk))
+
+            file_part = MIMEBase(main_type, sub_type)
+            file_part.set_payload(encoded.getvalue().decode('ascii'))
+            file_part['Content-Transfer-Encoding'] = 'base64'
         file_part.add_header("Content-Disposition", f"attachment; filename= {file_name}")
-        self._smtp_message.attach(file_part)
+        self._pending_attachments.append(file_part)
 
     @property
     def to_addresses(self) -> List[str]:
@@ -306,7 +394,7 @@ class SmtpSender:
     @to_addresses.setter
     def to_addresses(self, value: List[str]) -> None:
         self._to_addresses = value.copy()
-        self._recipients.extend(self._to_addresses)
+        self._recipients_set.update(dict.fromkeys(self._to_addresses))
 
     @property
     def cc_addresses(self) -> List[str]:
@@ -315,7 +403,7 @@ class SmtpSender:
     @cc_addresses.setter
     def cc_addresses(self, value: List[str]) -> None:
         self._cc_addresses = value.copy()
-        self._recipients.extend(self._cc_addresses)
+        self._recipients_set.update(dict.fromkeys(self._cc_addresses))
 
     @property
     def bcc_addresses(self) -> List[str]:
@@ -324,17 +412,26 @@ class SmtpSender:
     @bcc_addresses.setter
     def bcc_addresses(self, value: List[str]) -> None:
         self._bcc_addresses = value.copy()
-        self._recipients.extend(self._bcc_addresses)
+        self._recipients_set.update(dict.fromkeys(self._bcc_addresses))
+
+    @property
+    def recipients(self) -> List[str]:
+        return list(self._recipients_set)
 
-    def send_email(self, enable_subj_timestamp: bool = True) -> None:
+    def send_email(self,
+                   enable_subj_timestamp: bool = True,
+                   connection: Optional['SmtpConnection'] = None,
+                   pool: Optional['SmtpConnectionPool'] = None) -> None:
         """
         Sends this message via SMTP. Requires the following properties to be set at a minimum:\n
              to_addresses - A list of email addresses for the message To line.\n
              sendFrom - The email address to send the message from.\n
-             smtp_server - The SMTP host address.\n
+             smtp_server - The SMTP host address, unless a connection or pool is given.\n
 
         Args:
              enable_subj_timestamp - Adds the current timestamp to the subject line if True.\n
+             connection - (optional) An SmtpConnection to send through instead of opening a new one.\n
+             pool - (optional) An SmtpConnectionPool to borrow a connection from, if no connection is given.\n
         """
 
         # Assertions
@@ -342,45 +439,270 @@ class SmtpSender:
             raise Exception("An SMTP message must have a To: line address to be sent.")
         if (self.sendFrom is None) or (len(self.sendFrom) == 0):
             raise Exception("An SMTP message must have a From: line address to be sent.")
-        if (self.smtp_server is None) or (len(self.smtp_server) == 0):
+        if (connection is None) and (pool is None) and ((self.smtp_server is None) or (len(self.smtp_server) == 0)):
             raise Exception("An SMTP message must have an SMTP host address to be sent.")
 
-        # Optional subject line timestamp
-        timestamp_str = time.strftime('%Y-%m-%d %H:%M')
+        # Optional subject line timestamp, without changing the subject property so the message can be resent
         if enable_subj_timestamp:
-            self.subject = f"{self.subject} {timestamp_str}"
+            subject_line = f"{self.subject} {_minute_timestamp()}"
+        else:
+            subject_line = self.subject
 
-        # Set SMTP header fields (no BCC header by design)
-        self._smtp_message['Subject'] = self.subject
-        self._smtp_message['From'] = self.sendFrom
-        self._smtp_message['To'] = ','.join(self._to_addresses)
-        if len(self._cc_addresses) > 0:
-            self._smtp_message['Cc'] = ','.join(self._cc_addresses)
+        # Build the MIME message only when sending, so every send starts from a fresh message
+        content_parts = []
 
         # Add plain text message content, if any
         if len(self._text_parts) > 0:
-            text_part = MIMEText('\n'.join(self._text_parts), "plain")
-            self._smtp_message.attach(text_part)
+            content_parts.append(MIMEText('\n'.join(self._text_parts), "plain"))
 
         # Add html text message content, if any
         if len(self._html_parts) > 0:
-            html_part = MIMEText(self._html_header + '<BR>' + (''.join(self._html_parts)), "html")
-            self._smtp_message.attach(html_part)
+            content_parts.append(MIMEText(''.join(self._html_parts), "html"))
+
+        # A single content part is the body on its own, text and HTML together are alternative views of it
+        if len(content_parts) == 1:
+            body = content_parts[0]
+        else:
+            body = MIMEMultipart("alternative")
+            for content_part in content_parts:
+                body.attach(content_part)
+
+        # Add file attachments, if any, mixed in alongside the body
+        if len(self._pending_attachments) > 0:
+            self._smtp_message = MIMEMultipart("mixed")
+            self._smtp_message.attach(body)
+            for file_part in self._pending_attachments:
+                self._smtp_message.attach(file_part)
+        else:
+            self._smtp_message = body
+
+        # Set SMTP header fields (no BCC header by design)
+        self._smtp_message['Subject'] = subject_line
+        self._smtp_message['From'] = self.sendFrom
+        self._smtp_message['To'] = ','.join(self._to_addresses)
+        if len(self._cc_addresses) > 0:
+            self._smtp_message['Cc'] = ','.join(self._cc_addresses)
+
+        recipients = self.recipients
 
         # Send the message to all recipients including BCC addresses
-        with smtplib.SMTP(self.smtp_server) as s:
-            s.sendmail(self.sendFrom, self._recipients, self._smtp_message.as_string())
+        if (connection is None) and (pool is None):
+            with SmtpConnection(self.smtp_server) as connection:
+                connection.send_message(self._smtp_message, self.sendFrom, recipients)
+        elif connection is None:
+            connection = pool.acquire()
+            try:
+                connection.send_message(self._smtp_message, self.sendFrom, recipients)
+            finally:
+                pool.release(connection)
+        else:
+            connection.send_message(self._smtp_message, self.sendFrom, recipients)
         # END send_email()
     # END CLASS SmtpSender
 
 
+class SmtpConnection:
+    """
+    Represents a reusable SMTP connection. The connect and EHLO handshake is paid once when the
+    connection is opened, then any number of messages can be sent before it is closed.\n
+    Methods:
+        open - Connects to the SMTP host, with optional STARTTLS and login.\n
+        close - Ends the SMTP session.\n
+        send - Sends an SmtpSender message over this connection.\n
+        send_message - Sends an email Message object over this connection.\n
+
+    Properties:
+        host - The SMTP host address.\n
+        port - The SMTP host port, or 0 to use the default or a port given in the host address.\n
+        use_tls - Upgrades the connection with STARTTLS after connecting if True.\n
+        username - The login user name, or None to skip login.\n
+        password - The login password.\n
+        is_open - True if the connection is currently open.\n
+        messages_sent - The number of messages sent since the connection was opened.\n
+    """
+
+    def __init__(self,
+                 host: str,
+                 port: int = 0,
+                 use_tls: bool = False,
+                 username: str = None,
+                 password: str = None) -> None:
+        """
+        Args:
+            host: The SMTP host address
+            port: (optional) The SMTP host port
+            use_tls: (optional) Upgrades the connection with STARTTLS if True
+            username: (optional) The login user name
+            password: (optional) The login password
+        """
+        self.host: str = host
+        self.port: int = port
+        self.use_tls: bool = use_tls
+        self.username: str = username
+        self.password: str = password
+        self.messages_sent: int = 0
+
+        self._smtp: Optional[smtplib.SMTP] = None
+        # END __init__
+
+    def __enter__(self) -> 'SmtpConnection':
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def is_open(self) -> bool:
+        return self._smtp is not None
+
+    def open(self) -> None:
+        """Connects to the SMTP host if not already connected."""
+        if self._smtp is not None:
+            return
+        smtp = smtplib.SMTP()
+        try:
+            smtp.connect(self.host, self.port)
+            smtp.ehlo()
+            if self.use_tls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username is not None:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        self._smtp = smtp
+        self.messages_sent = 0
+
+    def close(self) -> None:
+        """Ends the SMTP session, if open."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except smtplib.SMTPServerDisconnected:
+            pass
+        finally:
+            self._smtp.close()
+            self._smtp = None
+
+    def send(self, msg: SmtpSender, enable_subj_timestamp: bool = True) -> None:
+        """Sends an SmtpSender message over this connection."""
+        msg.send_email(enable_subj_timestamp, connection=self)
+
+    def send_message(self, message: Message, from_address: str, recipients: List[str]) -> None:
+        """Sends an email Message over this connection, opening it first if needed."""
+        self.open()
+        try:
+            self._smtp.send_message(message, from_address, recipients)
+            self.messages_sent += 1
+        except smtplib.SMTPServerDisconnected:
+            # Drop the dead session so the next send reconnects
+            self._smtp.close()
+            self._smtp = None
+            raise
+    # END CLASS SmtpConnection
+
+
+class SmtpConnectionPool:
+    """
+    Represents a fixed size pool of reusable SMTP connections. Connections are opened lazily when borrowed
+    and are closed and reopened after sending the per-connection message cap, if one is set, to stay under
+    provider limits on messages per session.\n
+    Methods:
+        acquire - Borrows a connection from the pool, waiting for one if all are in use.\n
+        release - Returns a borrowed connection to the pool.\n
+        send_many - Sends a sequence of SmtpSender messages through the pool.\n
+        close - Closes every idle connection in the pool.\n
+
+    Properties:
+        host - The SMTP host address.\n
+        size - The number of connections in the pool.\n
+        max_msgs_per_conn - The number of messages to send before reconnecting, or None for no cap.\n
+    """
+
+    def __init__(self,
+                 host: str,
+                 size: int = 4,
+                 max_msgs_per_conn: int = None,
+                 port: int = 0,
+                 use_tls: bool = False,
+                 username: str = None,
+                 password: str = None) -> None:
+        """
+        Args:
+            host: The SMTP host address
+            size: (optional) The number of connections in the pool
+            max_msgs_per_conn: (optional) The number of messages to send before reconnecting
+            port: (optional) The SMTP host port
+            use_tls: (optional) Upgrades each connection with STARTTLS if True
+            username: (optional) The login user name
+            password: (optional) The login password
+        """
+        if size < 1:
+            raise Exception("An SMTP connection pool must have at least one connection.")
+
+        self.host: str = host
+        self.size: int = size
+        self.max_msgs_per_conn: int = max_msgs_per_conn
+
+        self._connections: queue.Queue = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(SmtpConnection(host, port, use_tls, username, password))
+        # END __init__
+
+    def __enter__(self) -> 'SmtpConnectionPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def acquire(self, timeout: float = None) -> SmtpConnection:
+        """Borrows an open connection from the pool, waiting up to the timeout if all are in use."""
+        connection = self._connections.get(timeout=timeout)
+        try:
+            connection.open()
+        except Exception:
+            self._connections.put(connection)
+            raise
+        return connection
+
+    def release(self, connection: SmtpConnection) -> None:
+        """Returns a borrowed connection to the pool, closing it if it reached the message cap."""
+        if (self.max_msgs_per_conn is not None) and (connection.messages_sent >= self.max_msgs_per_conn):
+            connection.close()
+        self._connections.put(connection)
+
+    def send_many(self, messages: List[SmtpSender], enable_subj_timestamp: bool = True) -> None:
+        """Sends each message through a connection borrowed from the pool."""
+        for msg in messages:
+            msg.send_email(enable_subj_timestamp, pool=self)
+
+    def close(self) -> None:
+        """Closes every idle connection in the pool. Closed connections reopen when next borrowed."""
+        idle = []
+        while True:
+            try:
+                idle.append(self._connections.get_nowait())
+            except queue.Empty:
+                break
+        for connection in idle:
+            try:
+                connection.close()
+            finally:
+                self._connections.put(connection)
+    # END CLASS SmtpConnectionPool
+
+
 def send_email_message(to_addresses: Union[str, List[str]],
                        subject: str,
                        html_text: str,
                        style: str = None,
                        from_address: str = None,
                        cc_addresses: Union[str, List[str]] = None,
-                       bcc_addresses: Union[str, List[str]] = None) -> None:
+                       bcc_addresses: Union[str, List[str]] = None,
+                       pool: SmtpConnectionPool = None) -> None:
     """
     Creates and sends an SMTP email message in one function call.\n
 
@@ -392,13 +714,14 @@ def send_email_message(to_addresses: Union[str, List[str]],
          from_address - (optional) Email address to send the message from, defaults to the "do not reply" address.\n
          cc_addresses - (optional) Either a list of email addresses or comma delimited string of Cc email addresses.\n
          bcc_addresses - (optional) Either a list of email addresses or comma delimited string of BCC email addresses.\n
+         pool - (optional) An SmtpConnectionPool to send through instead of opening a new connection.\n
     """
 
     msg = SmtpSender()
 
     # To line addresses are required
     if type(to_addresses) is str:
-        to_list = to_addresses.split(',')
+        to_list = _split_addresses(to_addresses)
     elif type(to_addresses) is list:
         to_list = to_addresses
     else:
@@ -408,7 +731,7 @@ def send_email_message(to_addresses: Union[str, List[str]],
     # Cc line addresses are optional
     if not (cc_addresses is None):
         if type(cc_addresses) is str:
-            cc_list = cc_addresses.split(',')
+            cc_list = _split_addresses(cc_addresses)
         elif type(cc_addresses) is list:
             cc_list = cc_addresses
         else:
@@ -418,7 +741,7 @@ def send_email_message(to_addresses: Union[str, List[str]],
     # BCC addresses are optional
     if not (bcc_addresses is None):
         if type(bcc_addresses) is str:
-            bcc_list = bcc_addresses.split(',')
+            bcc_list = _split_addresses(bcc_addresses)
         elif type(bcc_addresses) is list:
             bcc_list = bcc_addresses
         else:
@@ -432,10 +755,47 @@ def send_email_message(to_addresses: Union[str, List[str]],
     msg.subject = subject
     msg.add_html_text(html_text, style)
 
-    msg.send_email()
+    msg.send_email(pool=pool)
     # END send_email_message()
 
 
+async def send_batch(messages: List[SmtpSender],
+                     host: str,
+                     concurrency: int = 4,
+                     enable_subj_timestamp: bool = True,
+                     max_msgs_per_conn: int = None) -> None:
+    """
+    Asynchronously sends many SMTP email messages. Each of the concurrent workers holds one connection open
+    across the messages it sends, so the connection handshake is paid per worker rather than per message.
+    Every message is attempted, then the first error raised, if any, is raised again.\n
+
+    Args:
+         messages - The SmtpSender messages to send.\n
+         host - The SMTP host address.\n
+         concurrency - (optional) The number of messages to send at once, and connections to open.\n
+         enable_subj_timestamp - (optional) Adds the current timestamp to the subject lines if True.\n
+         max_msgs_per_conn - (optional) The number of messages to send before reconnecting.\n
+    """
+
+    pool = SmtpConnectionPool(host, size=concurrency, max_msgs_per_conn=max_msgs_per_conn)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _send(msg: SmtpSender) -> None:
+        # smtplib blocks, so each send runs in a worker thread on a connection borrowed from the pool
+        async with semaphore:
+            await asyncio.to_thread(msg.send_email, enable_subj_timestamp, pool=pool)
+
+    try:
+        results = await asyncio.gather(*(_send(msg) for msg in messages), return_exceptions=True)
+    finally:
+        pool.close()
+
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    # END send_batch()
+
+
 # MAIN
 
 